@@ -2,22 +2,139 @@
 
 import os
 import sys
-import subprocess
 import pathlib
 import json
 import datetime
 import time
+import statistics
+import io
 import argparse
-from typing import List, Dict, Any
+import asyncio
+import signal
+import tempfile
+import functools
+import concurrent.futures
+from collections import defaultdict
+from typing import List, Dict, Any, FrozenSet, Tuple, Optional
+
+# Only this much of a failed child's output is decoded into the result
+ERROR_TAIL_BYTES = 1024
+
+# How long an interrupted lacam.py gets to stop its solvers and remove its
+# temp directory before it is killed outright
+CHILD_STOP_GRACE_SECONDS = 5
+
+# When an existing waypoint_summary.json may be reused instead of rerunning:
+#   always - ignore any existing summary and run the experiment
+#   never  - never rerun once a summary has been generated
+#   stale  - rerun only if an input is newer than the summary
+# These only apply to experiments not already recorded as succeeded in
+# results.jsonl; recorded successes are resumed, and only --fresh reruns them.
+REFRESH_POLICIES = ["always", "never", "stale"]
+
+# Threads dedicated to reading waypoint_summary.json files off the event loop
+SUMMARY_IO_WORKERS = 16
+
+# Report line templates, parsed once instead of per row
+ROW_FMT = "{map:<20} {waypoints:<3} {agent_count:<7} {status:<10} {runtime:<10} {cost:<12} {cost_per_agent:<12}\n"
+WP_STATS_FMT = "  {waypoints}wp: Avg cost/agent={avg_cost_per_agent:.1f}, Avg runtime={avg_runtime_ms:.0f}ms\n"
+
+# Thread-pool knobs that a child process may honour; divided among parallel jobs
+THREAD_ENV_VARS = ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]
+
+class ProgressLine:
+    """Experiment progress on one line, repainted in place when stdout is a TTY"""
+    def __init__(self, total: int, done: int = 0, succeeded: int = 0, stream=sys.stdout):
+        self.total = total
+        self.done = done
+        self.succeeded = succeeded
+        self.stream = stream
+        self.is_tty = stream.isatty()
+        
+    def update(self, result: Dict[str, Any]):
+        """Count a finished experiment and repaint the progress line"""
+        self.done += 1
+        if result['status'] == 'success':
+            self.succeeded += 1
+        last = f"{result['map']} | {result['waypoints']}wp | {result['agent_count']} agents: {result['status']}"
+        if result.get('cached'):
+            last += " (cached)"
+        line = f"[{self.done}/{self.total}] {self.succeeded} succeeded | last: {last}"
+        if self.is_tty:
+            self.stream.write(f"\r{line}\x1b[K")
+        else:
+            self.stream.write(line + "\n")
+        self.stream.flush()
+        
+    def message(self, text: str):
+        """Print a permanent message without clobbering the progress line"""
+        if self.is_tty:
+            self.stream.write("\r\x1b[K")
+        self.stream.write(text + "\n")
+        self.stream.flush()
+        
+    def close(self):
+        """Finish the progress line"""
+        if self.is_tty:
+            self.stream.write("\n")
+            self.stream.flush()
+
+@functools.cache
+def optional_orjson():
+    """Import orjson on first use (keeps --help fast); None if it isn't installed"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def encode_json(obj: Any, indent: bool = False) -> bytes:
+    """Serialize obj to UTF-8 JSON, using orjson when available"""
+    orjson = optional_orjson()
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+def decode_json(data: bytes) -> Any:
+    """Parse UTF-8 JSON, using orjson when available"""
+    orjson = optional_orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def read_tail(f, max_bytes: int = ERROR_TAIL_BYTES) -> str:
+    """Decode only the last max_bytes of a binary file object"""
+    f.seek(0, os.SEEK_END)
+    f.seek(max(0, f.tell() - max_bytes))
+    return f.read().decode('utf-8', errors='replace')
+
+@functools.lru_cache(maxsize=None)
+def load_summary(summary_path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Load a waypoint_summary.json; the mtime in the key invalidates rewritten files"""
+    with open(summary_path, 'rb') as f:
+        return decode_json(f.read())
+
+def read_summary_file(summary_path: str) -> Dict[str, Any]:
+    """Load a waypoint_summary.json through the mtime-keyed cache"""
+    return load_summary(summary_path, os.stat(summary_path).st_mtime_ns)
 
 class ComprehensiveTestRunner:
-    def __init__(self, base_dir: str = "."):
+    def __init__(self, base_dir: str = ".", jobs: int = 1, fresh: bool = False, refresh: str = "always",
+                 pin_cpus: bool = True):
         self.base_dir = pathlib.Path(base_dir)
+        self.jobs = max(1, jobs)
+        self.fresh = fresh
+        self.refresh = refresh
+        self.pin_cpus = pin_cpus and hasattr(os, 'sched_setaffinity')
         self.maps_dir = self.base_dir / "scripts" / "map"
         self.scenarios_dir = self.base_dir / "scripts" / "scen"
         self.results_dir = self.base_dir / "results" / "comprehensive"
+        self.results_log = self.results_dir / "results.jsonl"
         self.lacam_script = self.base_dir / "lacam.py"
         self.exe_path = self.base_dir / "build" / "main"
+        self.base_cmd = ["python3", str(self.lacam_script), "--exe", str(self.exe_path)]
+        if not pin_cpus:
+            self.base_cmd.append("--no_pin")  # lacam.py pins its own solvers otherwise
         
         # Test configuration
         self.agent_counts = [100, 200, 300, 400, 500]
@@ -35,6 +152,115 @@ class ComprehensiveTestRunner:
         ]
         
         self.all_results = []
+        self.io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=SUMMARY_IO_WORKERS,
+                                                             thread_name_prefix="summary-io")
+        self.child_env = self.build_child_env()
+        self.cpu_slots = self.build_cpu_slots()
+        self.experiment_plan = self.build_experiment_plan()
+        
+    def build_child_env(self) -> Dict[str, str]:
+        """Split any thread-count env vars among parallel jobs to avoid oversubscription"""
+        env = dict(os.environ)
+        for var in THREAD_ENV_VARS:
+            if env.get(var, "").isdigit():
+                env[var] = str(max(1, int(env[var]) // self.jobs))
+        return env
+        
+    def build_cpu_slots(self) -> List[Optional[FrozenSet[int]]]:
+        """Split the CPUs available to this process into one disjoint block per job"""
+        if not self.pin_cpus:
+            return [None] * self.jobs
+        cpus = sorted(os.sched_getaffinity(0))
+        n = len(cpus)
+        if self.jobs >= n:
+            # One CPU per job, shared round-robin when there are more jobs than CPUs
+            return [frozenset([cpus[i % n]]) for i in range(self.jobs)]
+        return [frozenset(cpus[i * n // self.jobs:(i + 1) * n // self.jobs]) for i in range(self.jobs)]
+        
+    def child_env_for(self, cpus: Optional[FrozenSet[int]]) -> Dict[str, str]:
+        """Environment for a child pinned to cpus: thread pools capped at its CPU block"""
+        if cpus is None:
+            return self.child_env
+        env = dict(self.child_env)
+        for var in THREAD_ENV_VARS:
+            if var not in env:
+                env[var] = str(len(cpus))
+            elif env[var].isdigit():
+                # Never raise a limit the user (or build_child_env) already set
+                env[var] = str(min(int(env[var]), len(cpus)))
+        return env
+        
+    def build_experiment_plan(self) -> List[Dict[str, Any]]:
+        """Resolve the paths of every experiment once, up front, as plain strings"""
+        results_dir = str(self.results_dir)
+        plan = []
+        for map_config in self.maps:
+            map_name = map_config['map_file']
+            map_file = str(self.maps_dir / f"{map_name}.map")
+            for wp_config in self.waypoint_configs:
+                waypoints = wp_config['waypoints']
+                scenario_file = str(self.scenarios_dir / map_config['scen_dir'] / f"{map_name}-random-{wp_config['suffix']}.scen")
+                for agent_count in self.agent_counts:
+                    output_dir = os.path.join(results_dir, f"{map_name}_{waypoints}wp_{agent_count}agents")
+                    plan.append({
+                        'map': map_name,
+                        'waypoints': waypoints,
+                        'agent_count': agent_count,
+                        'map_file': map_file,
+                        'scenario_file': scenario_file,
+                        'output_dir': output_dir,
+                        'summary_file': os.path.join(output_dir, "waypoint_summary.json"),
+                        'stdout_log': os.path.join(output_dir, "stdout.log")
+                    })
+        return plan
+        
+    @staticmethod
+    def experiment_key(entry: Dict[str, Any]) -> Tuple[str, int, int]:
+        """Identify an experiment (plan entry or result) by map, waypoints and agent count"""
+        return (entry['map'], entry['waypoints'], entry['agent_count'])
+        
+    def load_completed_results(self) -> Dict[Tuple[str, int, int], Dict[str, Any]]:
+        """Load successful results recorded by a previous (possibly interrupted) run"""
+        completed = {}
+        if not self.results_log.exists():
+            return completed
+            
+        with open(self.results_log, 'rb') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    result = decode_json(line)
+                except json.JSONDecodeError:  # orjson's error type subclasses this
+                    continue  # Truncated line from an interrupted write
+                if result.get('status') == 'success':
+                    completed[self.experiment_key(result)] = result
+                    
+        return completed
+        
+    def summary_is_reusable(self, experiment: Dict[str, Any]) -> bool:
+        """Decide from the refresh policy whether an existing summary can stand in for a rerun"""
+        if self.refresh == "always":
+            return False
+        try:
+            summary_mtime = os.stat(experiment['summary_file']).st_mtime
+        except FileNotFoundError:
+            return False
+        if self.refresh == "never":
+            return True
+            
+        inputs = [experiment['scenario_file'], experiment['map_file'], self.exe_path, self.lacam_script]
+        return all(summary_mtime > os.stat(path).st_mtime for path in inputs)
+        
+    @staticmethod
+    def list_dir(path: pathlib.Path) -> FrozenSet[str]:
+        """Return the entry names of a directory (empty if it doesn't exist)"""
+        try:
+            with os.scandir(path) as entries:
+                return frozenset(entry.name for entry in entries)
+        except (FileNotFoundError, NotADirectoryError):
+            return frozenset()
         
     def ensure_directories(self):
         """Create necessary directories if they don't exist"""
@@ -49,22 +275,25 @@ class ComprehensiveTestRunner:
         if not self.exe_path.exists():
             missing_files.append(str(self.exe_path))
             
-        # Check maps
+        # Check maps (one directory listing instead of a stat per file)
+        map_entries = self.list_dir(self.maps_dir)
         for map_config in self.maps:
             map_file = self.maps_dir / f"{map_config['map_file']}.map"
-            if not map_file.exists():
+            if map_file.name not in map_entries:
                 missing_files.append(str(map_file))
                 
         # Check scenario files
+        scen_dir_entries = self.list_dir(self.scenarios_dir)
         for map_config in self.maps:
             scenario_dir = self.scenarios_dir / map_config['scen_dir']
-            if not scenario_dir.exists():
+            if scenario_dir.name not in scen_dir_entries:
                 missing_files.append(str(scenario_dir))
                 continue
                 
+            scenario_entries = self.list_dir(scenario_dir)
             for wp_config in self.waypoint_configs:
                 scenario_file = scenario_dir / f"{map_config['map_file']}-random-{wp_config['suffix']}.scen"
-                if not scenario_file.exists():
+                if scenario_file.name not in scenario_entries:
                     missing_files.append(str(scenario_file))
                 
         if missing_files:
@@ -75,95 +304,133 @@ class ComprehensiveTestRunner:
             
         return True
         
-    def run_single_experiment(self, map_config: Dict[str, Any], wp_config: Dict[str, Any], agent_count: int) -> Dict[str, Any]:
-        """Run a single experiment configuration"""
-        map_name = map_config['map_file']
-        waypoints = wp_config["waypoints"]
-        suffix = wp_config["suffix"]
+    async def read_summary(self, summary_file: str) -> Dict[str, Any]:
+        """Read a summary on the I/O pool so the event loop keeps dispatching meanwhile"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_pool, read_summary_file, summary_file)
         
-        print(f"\n🚀 Running: {map_name} | {waypoints}wp | {agent_count} agents")
-        sys.stdout.flush()  # Force output to appear immediately
+    @staticmethod
+    async def stop_child(proc: asyncio.subprocess.Process):
+        """Stop a running lacam.py: SIGINT first so it cleans up after itself, SIGKILL if it lingers"""
+        if proc.returncode is not None:
+            return
+        try:
+            proc.send_signal(signal.SIGINT)
+            await asyncio.wait_for(proc.wait(), timeout=CHILD_STOP_GRACE_SECONDS)
+        except (asyncio.TimeoutError, ProcessLookupError):
+            pass
+        finally:
+            # Also reached if this task is cancelled again while waiting
+            if proc.returncode is None:
+                proc.kill()
+                await proc.wait()
         
-        # Paths
-        map_file = self.maps_dir / f"{map_name}.map"
-        scenario_file = self.scenarios_dir / map_config['scen_dir'] / f"{map_name}-random-{suffix}.scen"
-        output_dir = self.results_dir / f"{map_name}_{waypoints}wp_{agent_count}agents"
-
-        # Debug: Print file paths
-        print(f"🔍 Debug info:")
-        print(f"   Map file: {map_file} (exists: {map_file.exists()})")
-        print(f"   Scenario file: {scenario_file} (exists: {scenario_file.exists()})")
-        print(f"   Output dir: {output_dir}")
-        print(f"   Executable: {self.exe_path} (exists: {self.exe_path.exists()})")
-        sys.stdout.flush()
+    async def run_single_experiment(self, experiment: Dict[str, Any], cpus: Optional[FrozenSet[int]] = None) -> Dict[str, Any]:
+        """Run a single experiment configuration from the experiment plan, optionally pinned to cpus"""
+        map_name = experiment['map']
+        waypoints = experiment['waypoints']
+        agent_count = experiment['agent_count']
+        
+        # Paths (existence already verified by check_prerequisites)
+        map_file = experiment['map_file']
+        scenario_file = experiment['scenario_file']
+        output_dir = experiment['output_dir']
+        summary_file = experiment['summary_file']
+        stdout_log = experiment['stdout_log']
+        
+        if self.summary_is_reusable(experiment):
+            try:
+                summary_data = await self.read_summary(summary_file)
+            except (OSError, ValueError):
+                pass  # Missing or truncated (e.g. lacam.py was killed mid-write): rerun it
+            else:
+                return {
+                    'map': map_name,
+                    'waypoints': waypoints,
+                    'agent_count': agent_count,
+                    'status': 'success',
+                    'cached': True,
+                    'wall_time': 0,
+                    'data': summary_data
+                }
 
         # Run the experiment
-        cmd = [
-            "python3", str(self.lacam_script),
-            "--exe", str(self.exe_path),
-            "--map", str(map_file),
-            "--scen", str(scenario_file),
+        cmd = self.base_cmd + [
+            "--map", map_file,
+            "--scen", scenario_file,
             "--num", str(agent_count),
             "--timeout", "100",
-            "--out", str(output_dir)
+            "--out", output_dir
         ]
 
-        # Debug: Print exact command
-        print(f"�� Command: {' '.join(cmd)}")
-        print(f"⏰ Starting subprocess at {datetime.datetime.now()}")
-        sys.stdout.flush()
+        # Keep the (potentially verbose) child output out of the Python heap:
+        # stdout goes straight to a log file, stderr to an anonymous temp file
+        # (a child needs a real file descriptor, so an in-memory spool would be
+        # rolled over to disk on spawn anyway).
+        os.makedirs(output_dir, exist_ok=True)
 
-        start_time = time.time()
+        start_time = time.perf_counter()
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)  # 2 min timeout (100s + buffer)
-            end_time = time.time()
+            with open(stdout_log, 'w+b') as stdout_f, \
+                    tempfile.TemporaryFile() as stderr_f:
+                proc = await asyncio.create_subprocess_exec(*cmd, stdout=stdout_f, stderr=stderr_f,
+                                                            env=self.child_env_for(cpus))
+                try:
+                    # Pin from the parent rather than in preexec_fn, which is unsafe
+                    # with the I/O pool and child watcher threads running. lacam.py is
+                    # still starting up, so the solvers it spawns inherit the affinity.
+                    if cpus:
+                        try:
+                            os.sched_setaffinity(proc.pid, cpus)
+                        except ProcessLookupError:
+                            pass  # Already exited; its return code is reported below
+                    returncode = await asyncio.wait_for(proc.wait(), timeout=120)  # 2 min timeout (100s + buffer)
+                except BaseException:
+                    # Timed out or cancelled: don't leave lacam.py or its solvers
+                    # running on a CPU slot the next experiment will be given
+                    await self.stop_child(proc)
+                    raise
+                wall_time = time.perf_counter() - start_time
+                if returncode != 0:
+                    stderr_tail = read_tail(stderr_f)
+                    stdout_tail = read_tail(stdout_f)
             
-            print(f"⏰ Subprocess completed at {datetime.datetime.now()}, took {end_time - start_time:.1f}s")
-            sys.stdout.flush()
-            
-            if result.returncode == 0:
+            if returncode == 0:
                 # Parse results from the output directory
-                summary_file = output_dir / "waypoint_summary.json"
-                if summary_file.exists():
-                    with open(summary_file, 'r') as f:
-                        summary_data = json.load(f)
-                        
-                    return {
-                        'map': map_name,
-                        'waypoints': waypoints,
-                        'agent_count': agent_count,
-                        'status': 'success',
-                        'wall_time': end_time - start_time,
-                        'data': summary_data
-                    }
-                else:
-                    print(f"❌ Summary file missing: {summary_file}")
-                    sys.stdout.flush()
+                try:
+                    summary_data = await self.read_summary(summary_file)
+                except FileNotFoundError:
                     return {
                         'map': map_name,
                         'waypoints': waypoints,
                         'agent_count': agent_count,
                         'status': 'no_summary',
-                        'wall_time': end_time - start_time,
-                        'error': 'Summary file not found'
+                        'wall_time': wall_time,
+                        'error': f'Summary file not found: {summary_file}'
                     }
+                    
+                return {
+                    'map': map_name,
+                    'waypoints': waypoints,
+                    'agent_count': agent_count,
+                    'status': 'success',
+                    'wall_time': wall_time,
+                    'data': summary_data
+                }
             else:
-                print(f"❌ Subprocess failed with return code {result.returncode}")
-                sys.stdout.flush()
                 return {
                     'map': map_name,
                     'waypoints': waypoints,
                     'agent_count': agent_count,
                     'status': 'failed',
-                    'wall_time': end_time - start_time,
-                    'return_code': result.returncode,
-                    'error': result.stderr,
-                    'stdout': result.stdout
+                    'wall_time': wall_time,
+                    'return_code': returncode,
+                    'error': stderr_tail,
+                    'stdout': stdout_tail,
+                    'stdout_log': stdout_log
                 }
                 
-        except subprocess.TimeoutExpired:
-            print(f"❌ Subprocess timed out after 2 minutes")
-            sys.stdout.flush()
+        except asyncio.TimeoutError:
             return {
                 'map': map_name,
                 'waypoints': waypoints,
@@ -173,130 +440,188 @@ class ComprehensiveTestRunner:
                 'error': 'Experiment timed out after 2 minutes'
             }
         except Exception as e:
-            print(f"❌ Exception during subprocess: {e}")
-            sys.stdout.flush()
             return {
                 'map': map_name,
                 'waypoints': waypoints,
                 'agent_count': agent_count,
                 'status': 'error',
-                'wall_time': time.time() - start_time,
+                'wall_time': time.perf_counter() - start_time,
                 'error': str(e)
             }
             
     def run_all_experiments(self):
         """Run all experiment combinations"""
-        total_experiments = len(self.maps) * len(self.waypoint_configs) * len(self.agent_counts)
-        experiment_count = 0
+        try:
+            asyncio.run(self.run_all_experiments_async())
+        finally:
+            self.io_pool.shutdown()
+        
+    async def run_all_experiments_async(self):
+        """Dispatch pending experiments on the event loop, at most self.jobs at a time"""
+        total_experiments = len(self.experiment_plan)
         
         print(f"\n🎯 Starting comprehensive testing: {total_experiments} experiments")
         print(f"Maps: {[m['map_file'] for m in self.maps]}")
         waypoint_cfgs = [f"{wp['waypoints']}wp" for wp in self.waypoint_configs]
         print(f"Waypoint configs: {waypoint_cfgs}")
         print(f"Agent counts: {self.agent_counts}")
+        print(f"Parallel jobs: {self.jobs}")
+        if self.pin_cpus:
+            print(f"CPU pinning: {[sorted(cpus) for cpus in self.cpu_slots]}")
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        for map_config in self.maps:
-            for wp_config in self.waypoint_configs:
-                for agent_count in self.agent_counts:
-                    experiment_count += 1
-                    print(f"\n{'='*60}")
-                    print(f"EXPERIMENT {experiment_count}/{total_experiments}")
-                    print(f"{'='*60}")
-                    sys.stdout.flush()
-                    
-                    print(f"🎯 About to start experiment: {map_config['map_file']} | {wp_config['waypoints']}wp | {agent_count} agents")
-                    sys.stdout.flush()
-                    
-                    result = self.run_single_experiment(map_config, wp_config, agent_count)
-                    self.all_results.append(result)
-                    
-                    print(f"📊 Experiment {experiment_count} completed with status: {result['status']}")
-                    sys.stdout.flush()
-                    
-                    # Print immediate result
-                    if result['status'] == 'success':
-                        cost = result['data']['global_results']['total_cost']
-                        runtime = result['data']['global_results']['total_runtime_ms']
-                        print(f"✅ SUCCESS: Cost={cost:,}, Runtime={runtime:.0f}ms")
-                    else:
-                        print(f"❌ FAILED: {result['status']}")
-                        if result.get('return_code'):
-                            print(f"   Return code: {result['return_code']}")
-                        if result.get('error'):
-                            print(f"   Error: {result['error']}")
-                        if result.get('stdout'):
-                            print(f"   Stdout: {result['stdout']}")
-                    
-                    sys.stdout.flush()
-                    print(f"🔄 Moving to next experiment...")
-                    sys.stdout.flush()
+        # Resume: experiments that already succeeded in results.jsonl are not rerun
+        results_by_key = {} if self.fresh else self.load_completed_results()
+        pending = [e for e in self.experiment_plan if self.experiment_key(e) not in results_by_key]
+        # Longest-processing-time first: start the biggest experiments early so
+        # they don't straggle at the end while other slots sit idle
+        pending.sort(key=lambda e: (-e['agent_count'], -e['waypoints']))
+        already_done = total_experiments - len(pending)
+        if already_done:
+            print(f"Resuming: {already_done} experiments already completed in {self.results_log}")
+        sys.stdout.flush()
+        # Only successes are resumed, so every already-done experiment succeeded
+        progress = ProgressLine(total_experiments, already_done, succeeded=already_done)
+        
+        # Each experiment is an independent lacam.py subprocess; the event loop
+        # keeps up to self.jobs of them in flight and handles each result (parsing,
+        # checkpointing, printing) while the others keep running. A running
+        # experiment holds one CPU slot; slots are disjoint unless --jobs exceeds
+        # the CPU count, in which case build_cpu_slots reuses CPUs round-robin.
+        free_slots = asyncio.Queue()
+        for cpus in self.cpu_slots:
+            free_slots.put_nowait(cpus)
+        
+        async def run_bounded(experiment: Dict[str, Any]) -> Dict[str, Any]:
+            cpus = await free_slots.get()
+            try:
+                return await self.run_single_experiment(experiment, cpus)
+            finally:
+                free_slots.put_nowait(cpus)
+                
+        with open(self.results_log, 'w+b' if self.fresh else 'a+b') as log:
+            # Terminate a line left truncated by an interrupted run before appending
+            if log.seek(0, os.SEEK_END) > 0:
+                log.seek(-1, os.SEEK_END)
+                if log.read(1) != b"\n":
+                    log.write(b"\n")
+            tasks = [asyncio.create_task(run_bounded(experiment)) for experiment in pending]
+            
+            for next_result in asyncio.as_completed(tasks):
+                result = await next_result
+                
+                # Checkpoint every result so an interrupted run loses nothing
+                log.write(encode_json(result) + b"\n")
+                log.flush()
+                results_by_key[self.experiment_key(result)] = result
+                
+                if result['status'] != 'success':
+                    details = [f"❌ {result['map']} | {result['waypoints']}wp | {result['agent_count']} agents: {result['status']}"]
+                    if result.get('return_code'):
+                        details.append(f"   Return code: {result['return_code']}")
+                    if result.get('error'):
+                        details.append(f"   Error: {result['error']}")
+                    if result.get('stdout'):
+                        details.append(f"   Stdout (tail): {result['stdout']}")
+                    if result.get('stdout_log'):
+                        details.append(f"   Stdout log: {result['stdout_log']}")
+                    progress.message("\n".join(details))
+                progress.update(result)
+                
+        progress.close()
+                
+        # Keep the report in plan order regardless of completion order
+        self.all_results.extend(results_by_key[self.experiment_key(e)] for e in self.experiment_plan)
                     
-        total_time = time.time() - start_time
+        total_time = time.perf_counter() - start_time
         print(f"\n🎉 All experiments completed in {total_time:.1f} seconds")
         
+    def tabulate_results(self) -> Tuple[List[Dict[str, Any]], Dict[Tuple[str, int], List[Dict[str, float]]]]:
+        """Build the results-table rows and the successful-result buckets in one pass"""
+        rows = []
+        buckets = defaultdict(list)
+        for result in self.all_results:
+            row = {
+                'map': result['map'][:19],
+                'waypoints': result['waypoints'],
+                'agent_count': result['agent_count'],
+                'status': result['status'][:9],
+                'runtime': "N/A",
+                'cost': "N/A",
+                'cost_per_agent': "N/A"
+            }
+            if result['status'] == 'success':
+                global_results = result['data']['global_results']
+                cost_per_agent = result['data']['performance_metrics']['avg_cost_per_agent']
+                row['runtime'] = f"{global_results['total_runtime_ms']:.0f}ms"
+                row['cost'] = f"{global_results['total_cost']:,}"
+                row['cost_per_agent'] = f"{cost_per_agent:.1f}"
+                buckets[(result['map'], result['waypoints'])].append({
+                    'cost_per_agent': cost_per_agent,
+                    'runtime_ms': global_results['total_runtime_ms']
+                })
+            rows.append(row)
+        return rows, buckets
+        
+    @staticmethod
+    def aggregate_by_map(buckets: Dict[Tuple[str, int], List[Dict[str, float]]]) -> Dict[Tuple[str, int], Dict[str, float]]:
+        """Average each (map, waypoints) bucket of successful results"""
+        return {
+            key: {
+                'avg_cost_per_agent': statistics.fmean(r['cost_per_agent'] for r in bucket),
+                'avg_runtime_ms': statistics.fmean(r['runtime_ms'] for r in bucket)
+            }
+            for key, bucket in buckets.items()
+        }
+        
     def generate_comprehensive_report(self):
         """Generate a comprehensive report of all results"""
         report_file = self.results_dir / "comprehensive_report.json"
         summary_file = self.results_dir / "comprehensive_summary.txt"
         
         # Save raw results
-        with open(report_file, 'w') as f:
-            json.dump(self.all_results, f, indent=2)
-            
-        # Generate summary report
-        with open(summary_file, 'w') as f:
-            f.write("COMPREHENSIVE LACAM TESTING REPORT\n")
-            f.write("=" * 80 + "\n\n")
-            f.write(f"Generated: {datetime.datetime.now().isoformat()}\n")
-            f.write(f"Total Experiments: {len(self.all_results)}\n\n")
-            
-            # Success rate
-            successful = sum(1 for r in self.all_results if r['status'] == 'success')
-            f.write(f"Success Rate: {successful}/{len(self.all_results)} ({successful/len(self.all_results)*100:.1f}%)\n\n")
+        with open(report_file, 'wb') as f:
+            f.write(encode_json(self.all_results, indent=True))
             
-            # Results table
-            f.write("RESULTS SUMMARY\n")
-            f.write("-" * 100 + "\n")
-            f.write(f"{'Map':<20} {'WP':<3} {'Agents':<7} {'Status':<10} {'Runtime':<10} {'Cost':<12} {'Cost/Agent':<12}\n")
-            f.write("-" * 100 + "\n")
+        # Generate summary report, buffered in memory and written in one go
+        out = io.StringIO()
+        out.write("COMPREHENSIVE LACAM TESTING REPORT\n")
+        out.write("=" * 80 + "\n\n")
+        out.write(f"Generated: {datetime.datetime.now().isoformat()}\n")
+        out.write(f"Total Experiments: {len(self.all_results)}\n\n")
+        
+        rows, buckets = self.tabulate_results()
+        
+        # Success rate
+        successful = sum(len(bucket) for bucket in buckets.values())
+        out.write(f"Success Rate: {successful}/{len(self.all_results)} ({successful/len(self.all_results)*100:.1f}%)\n\n")
+        
+        # Results table
+        out.write("RESULTS SUMMARY\n")
+        out.write("-" * 100 + "\n")
+        out.write(ROW_FMT.format(map='Map', waypoints='WP', agent_count='Agents', status='Status',
+                                 runtime='Runtime', cost='Cost', cost_per_agent='Cost/Agent'))
+        out.write("-" * 100 + "\n")
+        
+        out.writelines(ROW_FMT.format_map(row) for row in rows)
             
-            for result in self.all_results:
-                map_name = result['map'][:19]
-                waypoints = result['waypoints']
-                agent_count = result['agent_count']
-                status = result['status'][:9]
-                
-                if result['status'] == 'success':
-                    runtime = f"{result['data']['global_results']['total_runtime_ms']:.0f}ms"
-                    cost = result['data']['global_results']['total_cost']
-                    cost_per_agent = f"{result['data']['performance_metrics']['avg_cost_per_agent']:.1f}"
-                    cost_str = f"{cost:,}"
-                else:
-                    runtime = "N/A"
-                    cost_str = "N/A"
-                    cost_per_agent = "N/A"
-                    
-                f.write(f"{map_name:<20} {waypoints:<3} {agent_count:<7} {status:<10} {runtime:<10} {cost_str:<12} {cost_per_agent:<12}\n")
+        # Performance analysis by map
+        out.write("\n\nPERFORMANCE ANALYSIS BY MAP\n")
+        out.write("-" * 50 + "\n")
+        
+        map_stats = self.aggregate_by_map(buckets)
+        for map_config in self.maps:
+            map_name = map_config['map_file']
+            wp_stats = [(wp['waypoints'], map_stats.get((map_name, wp['waypoints']))) for wp in self.waypoint_configs]
+            wp_stats = [(waypoints, stats) for waypoints, stats in wp_stats if stats]
+            if wp_stats:
+                out.write(f"\n{map_name}:\n")
+                out.writelines(WP_STATS_FMT.format_map(dict(stats, waypoints=waypoints)) for waypoints, stats in wp_stats)
                 
-            # Performance analysis by map
-            f.write("\n\nPERFORMANCE ANALYSIS BY MAP\n")
-            f.write("-" * 50 + "\n")
+        with open(summary_file, 'w') as f:
+            f.write(out.getvalue())
             
-            for map_config in self.maps:
-                map_name = map_config['map_file']
-                map_results = [r for r in self.all_results if r['map'] == map_name and r['status'] == 'success']
-                if map_results:
-                    f.write(f"\n{map_name}:\n")
-                    for wp_config in self.waypoint_configs:
-                        waypoints = wp_config['waypoints']
-                        wp_results = [r for r in map_results if r['waypoints'] == waypoints]
-                        if wp_results:
-                            avg_cost_per_agent = sum(r['data']['performance_metrics']['avg_cost_per_agent'] for r in wp_results) / len(wp_results)
-                            avg_runtime = sum(r['data']['global_results']['total_runtime_ms'] for r in wp_results) / len(wp_results)
-                            f.write(f"  {waypoints}wp: Avg cost/agent={avg_cost_per_agent:.1f}, Avg runtime={avg_runtime:.0f}ms\n")
-                
         print(f"📊 Comprehensive report saved to: {report_file}")
         print(f"📋 Summary report saved to: {summary_file}")
         
@@ -317,10 +642,22 @@ class ComprehensiveTestRunner:
 def main():
     parser = argparse.ArgumentParser(description='Run comprehensive LACAM testing across all maps and configurations')
     parser.add_argument('--base_dir', default='.', help='Base directory for the project')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of experiments to run in parallel')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Ignore results recorded by a previous run instead of resuming '
+                             '(the only way to rerun experiments that already succeeded)')
+    parser.add_argument('--refresh', choices=REFRESH_POLICIES, default='always',
+                        help='When to reuse an existing waypoint_summary.json instead of running an experiment '
+                             '("always" runs it even if a summary exists). Experiments recorded as succeeded '
+                             'in results.jsonl are skipped under every policy unless --fresh is given')
+    parser.add_argument('--skip-existing', dest='refresh', action='store_const', const='stale',
+                        help='Shorthand for --refresh stale')
+    parser.add_argument('--no_pin', dest='pin_cpus', action='store_false',
+                        help='Do not pin parallel experiments, or the LaCAM runs inside them, to disjoint CPU sets')
     
     args = parser.parse_args()
     
-    runner = ComprehensiveTestRunner(args.base_dir)
+    runner = ComprehensiveTestRunner(args.base_dir, args.jobs, args.fresh, args.refresh, args.pin_cpus)
     success = runner.run()
     
     if success:
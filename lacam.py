@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 import argparse
 import pathlib
-import subprocess
 import tempfile
 import time
 import signal
@@ -10,86 +9,150 @@ import os
 import json
 import datetime
 import shutil
+import asyncio
+import functools
+import mmap
 
-# Global list to track temp files for cleanup
-temp_files = []
+# Solved segments, keyed by segment_key(). A segment identical to one already
+# solved in this run reuses that plan instead of launching LaCAM again. lacam3
+# is not deterministic (racing refiner threads, wall-clock deadline), so this
+# keeps one result per distinct instance rather than reproducing a rerun.
+_segment_cache = {}
 
-def cleanup_temp_files():
-    """Remove all temporary files"""
-    for f in temp_files:
+@functools.cache
+def optional_orjson():
+    """Import orjson on first use; None if it isn't installed"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+def write_json(path, obj):
+    """Write obj as indented JSON, using orjson when available"""
+    orjson = optional_orjson()
+    if orjson is None:
+        with open(path, 'w') as f:
+            json.dump(obj, f, indent=2)
+        return
+    with open(path, 'wb') as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+
+def default_jobs():
+    """Number of CPUs this process may run on (respects affinity set by a parent)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+@functools.cache
+def physical_cores():
+    """CPUs available to this process, grouped by physical core (SMT siblings together)"""
+    cores = {}
+    for cpu in sorted(os.sched_getaffinity(0)):
         try:
-            if os.path.exists(f):
-                os.unlink(f)
-        except:
-            pass
+            with open(f'/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list') as f:
+                siblings = f.read().strip()
+        except OSError:
+            siblings = str(cpu)  # no topology info, treat every CPU as a core
+        cores.setdefault(siblings, []).append(cpu)
+    return [frozenset(cpus) for cpus in cores.values()]
+
+def cpu_slots(jobs):
+    """Split the available CPUs into one disjoint set per job
+
+    LaCAM is multi-threaded, so jobs get whole physical cores while there
+    are enough of them; beyond that cores are split into their SMT siblings,
+    and only with more jobs than CPUs do two jobs share a CPU.
+    """
+    cores = physical_cores()
+    if jobs <= len(cores):
+        n = len(cores)
+        return [frozenset().union(*cores[i * n // jobs:(i + 1) * n // jobs]) for i in range(jobs)]
+    # Split the largest remaining core in half until there is a set per job
+    slots = [sorted(core) for core in cores]
+    while len(slots) < jobs:
+        i = max(range(len(slots)), key=lambda k: len(slots[k]))
+        if len(slots[i]) == 1:
+            break
+        half = len(slots[i]) // 2
+        slots[i:i + 1] = [slots[i][:half], slots[i][half:]]
+    return [frozenset(slots[i % len(slots)]) for i in range(jobs)]
+
+def pin_process(pid, cpus):
+    """Restrict a running process, including threads it has already started, to cpus"""
+    os.sched_setaffinity(pid, cpus)  # threads started from now on inherit this
+    try:
+        tids = [int(tid) for tid in os.listdir(f'/proc/{pid}/task')]
+    except OSError:
+        return
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, cpus)
+        except ProcessLookupError:
+            pass  # thread already exited
 
 def signal_handler(signum, frame):
     """Handle SIGINT gracefully"""
     print("\nCaught interrupt, cleaning up...")
-    cleanup_temp_files()
-    sys.exit(1)
+    sys.exit(1)  # unwinds through run_experiment, which removes its temp directory
 
 def parse_waypoint_scenario(scen_path):
     """Parse waypoint scenario file and return list of agent data"""
     agents = []
+    scen_row = 0  # index among the file's agent rows, including skipped ones
     
-    with open(scen_path, 'r') as f:
-        lines = f.readlines()
-    
-    # Skip header line if present (version 1)
-    start_idx = 0
-    if lines and lines[0].strip().startswith('version'):
-        start_idx = 1
-    
-    i = start_idx
-    while i < len(lines):
-        line = lines[i].strip()
-        if not line:
-            i += 1
-            continue
-            
-        parts = line.split('\t')
-        if len(parts) < 10:
-            i += 1
-            continue
-            
-        # Standard MAPF fields
-        s_row = int(parts[4])
-        s_col = int(parts[5])
-        g_row = int(parts[6])
-        g_col = int(parts[7])
-        # parts[8] is optimal length, parts[9] is number of waypoints
-        K = int(parts[9])
-        
-        # Parse waypoints - they should all be on the same line
-        waypoints = []
-        if len(parts) >= 10 + K * 2:
-            waypoint_parts = parts[10:]
-            
-            # Extract waypoints
-            for j in range(K):
-                if j*2 + 1 < len(waypoint_parts):
-                    wp_row = int(waypoint_parts[j*2])
-                    wp_col = int(waypoint_parts[j*2 + 1])
-                    waypoints.append((wp_row, wp_col))
-        else:
-            print(f"Warning: Not enough waypoint data for agent with {K} waypoints")
-            continue
-        
-        agents.append({
-            'start': (s_row, s_col),
-            'goal': (g_row, g_col),
-            'waypoints': waypoints,
-            'K': K,
-            'bucket_id': int(parts[0])  # Store original bucket ID
-        })
-        
-        i += 1
+    with open(scen_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return agents  # mmap cannot map an empty file
+        # Read lines straight from the page cache instead of materializing
+        # the whole file as a list of str
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for line_idx, line in enumerate(iter(mm.readline, b'')):
+                line = line.strip()
+                # Skip header line if present (version 1)
+                if line_idx == 0 and line.startswith(b'version'):
+                    continue
+                if not line:
+                    continue
+                row = scen_row
+                scen_row += 1
+                    
+                parts = line.split(b'\t')
+                if len(parts) < 10:
+                    continue
+                    
+                # Standard MAPF fields
+                s_row = int(parts[4])
+                s_col = int(parts[5])
+                g_row = int(parts[6])
+                g_col = int(parts[7])
+                # parts[8] is optimal length, parts[9] is number of waypoints
+                K = int(parts[9])
+                
+                # Parse waypoints - they should all be on the same line
+                if len(parts) < 10 + K * 2:
+                    print(f"Warning: Not enough waypoint data for agent with {K} waypoints")
+                    continue
+                coords = [int(v) for v in parts[10:10 + K * 2]]
+                waypoints = list(zip(coords[0::2], coords[1::2]))
+                
+                agents.append({
+                    'start': (s_row, s_col),
+                    'goal': (g_row, g_col),
+                    'waypoints': waypoints,
+                    'K': K,
+                    'bucket_id': int(parts[0]),  # Store original bucket ID
+                    'scen_row': row,
+                    # Every location the agent must visit, in order: segment i
+                    # runs from stops[i] to stops[i + 1]
+                    'stops': ((s_row, s_col), *waypoints, (g_row, g_col))
+                })
     
     return agents
 
+@functools.lru_cache(maxsize=None)
 def get_map_dimensions(map_file):
-    """Extract map dimensions from a map file"""
+    """Extract map dimensions from a map file (cached: multi-scale runs reuse the same map)"""
     try:
         with open(map_file, 'r') as f:
             lines = f.readlines()
@@ -114,46 +177,68 @@ def get_map_dimensions(map_file):
         print(f"Error reading map file {map_file}: {e}, using default 128x128")
         return 128, 128
 
-def create_segment_scenario(agents, segment_idx, map_filename, map_width=128, map_height=128):
-    """Create temporary scenario file for a specific segment"""
-    temp_f = tempfile.NamedTemporaryFile(mode='w', suffix='.scen', delete=False)
-    temp_files.append(temp_f.name)
+def segment_endpoints(agent, segment_idx):
+    """Start and goal of an agent in a segment; agents past their final goal stay put"""
+    stops = agent['stops']
+    if segment_idx + 1 < len(stops):
+        return stops[segment_idx], stops[segment_idx + 1]
+    return stops[-1], stops[-1]
+
+def segment_key(agents, segment_idx, seed, timeout):
+    """The inputs that define a segment's LaCAM instance"""
+    return tuple(segment_endpoints(agent, segment_idx) for agent in agents), seed, timeout
+
+def active_agents(agents, segment_idx):
+    """Agents that still have a waypoint or their goal ahead of them in this segment"""
+    return [agent for agent in agents if segment_idx + 1 < len(agent['stops'])]
+
+def is_idle_segment(agents, segment_idx):
+    """Whether every agent already starts this segment at its goal"""
+    return all(start == goal for start, goal in (segment_endpoints(agent, segment_idx) for agent in agents))
+
+def is_plain_scenario(agents):
+    """Whether the agents are the leading rows of their file and have no waypoints
+
+    LaCAM reads start/goal from the first --num rows of a scenario file, so in
+    that case the original file already describes segment 0.
+    """
+    return (bool(agents)
+            and agents[-1]['scen_row'] == len(agents) - 1
+            and not any(agent['waypoints'] for agent in agents))
+
+def create_segment_scenario(agents, segment_idx, map_filename, map_width=128, map_height=128, scen_path=None, tmpdir=None):
+    """Create temporary scenario file for a specific segment
+
+    If scen_path is given and segment 0 would just repeat it, the original
+    path is returned and no file is written into tmpdir.
+    """
+    if scen_path is not None and segment_idx == 0 and is_plain_scenario(agents):
+        return str(scen_path)
     
-    # Write header
-    temp_f.write("version 1\n")
+    fd, temp_path = tempfile.mkstemp(suffix='.scen', dir=tmpdir)
     
-    for i, agent in enumerate(agents):
-        # Determine start and goal for this segment
-        if segment_idx == 0:
-            # First segment: start -> wp1 (or goal if no waypoints)
-            start = agent['start']
-            goal = agent['waypoints'][0] if agent['waypoints'] else agent['goal']
-        elif segment_idx <= len(agent['waypoints']):
-            # Middle segments: wp(i-1) -> wp(i) or wp(last) -> goal
-            start = agent['waypoints'][segment_idx - 1]
-            if segment_idx == len(agent['waypoints']):
-                # Last segment: last waypoint -> goal
-                goal = agent['goal']
-            else:
-                goal = agent['waypoints'][segment_idx]
-        else:
-            # Agent already reached final goal, stay put
-            start = agent['goal']
-            goal = agent['goal']
+    # Header plus one line per agent, encoded once and handed to the OS
+    # directly instead of going through a buffered text file
+    lines = [b"version 1\n"]
+    for agent in agents:
+        start, goal = segment_endpoints(agent, segment_idx)
         
-        # Write scenario line: bucket map width height s_row s_col g_row g_col opt_len
+        # Scenario line: bucket map width height s_row s_col g_row g_col opt_len
         # Calculate Manhattan distance for opt_len
         opt_len = abs(start[0] - goal[0]) + abs(start[1] - goal[1])
-        temp_f.write(f"{agent['bucket_id']}\t{map_filename}\t{map_width}\t{map_height}\t{start[0]}\t{start[1]}\t{goal[0]}\t{goal[1]}\t{opt_len}\n")
-    
-    temp_f.close()
-    return temp_f.name
+        lines.append(f"{agent['bucket_id']}\t{map_filename}\t{map_width}\t{map_height}\t{start[0]}\t{start[1]}\t{goal[0]}\t{goal[1]}\t{opt_len}\n".encode())
+    data = memoryview(b"".join(lines))
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
+    return temp_path
 
-def run_lacam_segment(exe, map_path, scen_path, num_agents, seed, timeout):
+async def run_lacam_segment(exe, map_path, scen_path, num_agents, seed, timeout, tmpdir, cpus=None):
     """Run LaCAM on a single segment"""
     # Create temporary output file
-    temp_out = tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', delete=False)
-    temp_files.append(temp_out.name)
+    temp_out = tempfile.NamedTemporaryFile(mode='w', suffix='.yaml', dir=tmpdir, delete=False)
     temp_out.close()
     
     cmd = [
@@ -167,33 +252,88 @@ def run_lacam_segment(exe, map_path, scen_path, num_agents, seed, timeout):
     ]
     
     start_time = time.time()
+    # Results come from the --output file, so stdout is discarded; stderr is
+    # kept as raw bytes and only decoded when the run fails
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE)
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout+10)
-        runtime = time.time() - start_time
-        
-        if result.returncode != 0:
-            print(f"LaCAM failed with return code {result.returncode}")
-            print(f"stdout: {result.stdout}")
-            print(f"stderr: {result.stderr}")
-            print(f"Command was: {' '.join(cmd)}")
-            return None, runtime, None
-        
-        # Parse cost from YAML output file
-        cost = 0
-        try:
-            with open(temp_out.name, 'r') as f:
-                for line in f:
-                    if line.startswith('soc='):
-                        cost = int(line.split('=')[1].strip())
-                        break
-        except:
-            pass
-        
-        return cost, runtime, temp_out.name
-        
-    except subprocess.TimeoutExpired:
+        # Pinned from the parent: preexec_fn is unsafe with asyncio's child
+        # watcher threads running
+        if cpus:
+            try:
+                pin_process(proc.pid, cpus)
+            except ProcessLookupError:
+                pass  # already exited; communicate() reports how
+        _, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout+10)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
         print(f"LaCAM timed out after {timeout} seconds")
-        return None, timeout, None
+        return None, 0, False, timeout, None
+    except BaseException:
+        # Cancelled (Ctrl-C, or another segment's task raised): don't leave the
+        # solver running after its temp directory is removed
+        if proc.returncode is None:
+            proc.kill()
+        await proc.wait()
+        raise
+    runtime = time.time() - start_time
+    
+    if proc.returncode != 0:
+        print(f"LaCAM failed with return code {proc.returncode}")
+        print(f"stderr: {stderr.decode(errors='replace')}")
+        print(f"Command was: {' '.join(cmd)}")
+        return None, 0, False, runtime, None
+    
+    # Parse cost, makespan and solved flag from the YAML output in one pass;
+    # they sit in the header, so stop reading once all three are found
+    cost = 0
+    makespan = 0
+    solved = False
+    found = 0
+    try:
+        with open(temp_out.name, 'r') as f:
+            for line in f:
+                if line.startswith('soc='):
+                    cost = int(line.split('=')[1].strip())
+                elif line.startswith('makespan='):
+                    makespan = int(line.split('=')[1].strip())
+                elif line.startswith('solved='):
+                    solved = int(line.split('=')[1].strip()) == 1
+                else:
+                    continue
+                found += 1
+                if found == 3:
+                    break
+    except:
+        pass
+    
+    return cost, makespan, solved, runtime, temp_out.name
+
+async def solve_segments(exe, map_path, temp_scens, seed, timeout, jobs, tmpdir, pin_cpus=True):
+    """Run LaCAM on every (scenario, agent count) pair concurrently, at most `jobs` at a time
+
+    With pin_cpus each running solver is confined to its own disjoint CPU set
+    (see cpu_slots), so concurrent solvers don't compete for the same cores.
+    """
+    # No point in more slots than segments: fewer slots means bigger CPU sets
+    jobs = max(1, min(jobs, len(temp_scens)))
+    if pin_cpus and hasattr(os, 'sched_setaffinity'):
+        slots = cpu_slots(jobs)
+    else:
+        slots = [None] * jobs
+    # Each free slot sits in the queue, which also bounds concurrency to `jobs`
+    free_slots = asyncio.Queue()
+    for cpus in slots:
+        free_slots.put_nowait(cpus)
+    
+    async def run_bounded(temp_scen, num_agents):
+        cpus = await free_slots.get()
+        try:
+            return await run_lacam_segment(exe, map_path, temp_scen, num_agents, seed, timeout, tmpdir, cpus)
+        finally:
+            free_slots.put_nowait(cpus)
+    
+    return await asyncio.gather(*(run_bounded(temp_scen, num_agents) for temp_scen, num_agents in temp_scens))
 
 def main():
     # Set up signal handler
@@ -207,6 +347,10 @@ def main():
     parser.add_argument('--multi_scale', action='store_true', help='Run with agent counts 100, 200, 300, 400, 500')
     parser.add_argument('--seed', type=int, default=42, help='Random seed')
     parser.add_argument('--timeout', type=int, default=100, help='Total timeout in seconds (divided among segments)')
+    parser.add_argument('--jobs', type=int, default=default_jobs(), help='Number of segments to solve in parallel (default: available CPUs)')
+    parser.add_argument('--drop_finished', action='store_true',
+                        help='Leave agents that reached their final goal out of later segments (they no longer block other agents)')
+    parser.add_argument('--no_pin', action='store_true', help='Do not pin parallel LaCAM runs to disjoint CPU sets')
     parser.add_argument('--out', required=True, help='Output directory for results')
     
     args = parser.parse_args()
@@ -281,8 +425,6 @@ def main():
             
             print(f"| {agent_count:>6} | {runtime_s:>6.2f}s | {total_cost:>10,} | {cost_per_agent:>9.1f} | {num_segments:>8} | {success:>7} |")
         print(f"{'='*80}")
-    
-    cleanup_temp_files()
 
 def run_experiment(agents, args, out_dir):
     """Run a single experiment with the given agents"""
@@ -302,6 +444,8 @@ def run_experiment(agents, args, out_dir):
     # Run segments
     total_runtime = 0
     total_cost = 0
+    max_makespan = 0
+    all_solved = True
     wall_clock_start = time.time()
     
     # Track detailed results for summary
@@ -313,89 +457,119 @@ def run_experiment(agents, args, out_dir):
         'max_waypoints': max_waypoints,
         'total_segments': num_segments,
         'command': ' '.join(sys.argv),
-        'timestamp': datetime.datetime.now().isoformat(),
+        'timestamp': datetime.datetime.fromtimestamp(wall_clock_start).isoformat(),
         'exe_path': str(args.exe),
         'total_timeout': args.timeout,
         'per_segment_timeout': per_segment_timeout
     }
     
     try:
-        for segment_idx in range(num_segments):  # 0 to max_waypoints inclusive
-            print(f"\n--- Segment {segment_idx} ---")
-            
-            # Create temporary scenario for this segment
+        # Scenario files and raw LaCAM output live in a private directory
+        # (inside out_dir so plans can be renamed into place) that is removed
+        # on every exit path, including Ctrl-C and sys.exit
+        with tempfile.TemporaryDirectory(prefix='lacam_', dir=out_dir) as tmpdir:
             map_filename = pathlib.Path(args.map).name
             # Get map dimensions from the map file
             map_width, map_height = get_map_dimensions(args.map)
-            temp_scen = create_segment_scenario(agents, segment_idx, map_filename, map_width, map_height)
-            
-            # Run LaCAM
-            cost, runtime, plan_file = run_lacam_segment(
-                args.exe, args.map, temp_scen, num_agents, args.seed, per_segment_timeout
-            )
+            # With --drop_finished, agents past their final goal are left out
+            segment_agents = [active_agents(agents, segment_idx) if args.drop_finished else agents
+                              for segment_idx in range(num_segments)]  # 0 to max_waypoints inclusive
+            segment_keys = [segment_key(segment_agents[segment_idx], segment_idx, args.seed, per_segment_timeout)
+                            for segment_idx in range(num_segments)]
+            idle = {segment_idx for segment_idx in range(num_segments)
+                    if is_idle_segment(segment_agents[segment_idx], segment_idx)}
+            # Segments solved by an earlier experiment (e.g. a repeated multi-scale
+            # agent count) are not rerun, and segments where nobody has to move
+            # never reach LaCAM
+            pending = [segment_idx for segment_idx in range(num_segments)
+                       if segment_idx not in idle and segment_keys[segment_idx] not in _segment_cache]
+            # Segments only depend on the scenario (each starts where the previous
+            # one's goals are), so build every segment scenario up front...
+            temp_scens = [
+                (create_segment_scenario(segment_agents[segment_idx], segment_idx, map_filename, map_width, map_height,
+                                         args.scen, tmpdir),
+                 len(segment_agents[segment_idx]))
+                for segment_idx in pending
+            ]
+        
+            # ...then launch all the LaCAM processes from one event loop
+            segment_runs = dict(zip(pending, asyncio.run(solve_segments(
+                args.exe, args.map, temp_scens, args.seed, per_segment_timeout, args.jobs, tmpdir,
+                pin_cpus=not args.no_pin
+            ))))
+        
+            for segment_idx in range(num_segments):
+                print(f"\n--- Segment {segment_idx} ---")
+                segment_out = out_dir / f"segment_{segment_idx}.yaml"
             
-            if cost is None:
-                print(f"Segment {segment_idx} failed!")
-                cleanup_temp_files()
-                sys.exit(1)
+                cached = segment_idx not in segment_runs and segment_idx not in idle
+                if segment_idx in idle:
+                    # Trivially solved: zero cost and makespan, no plan to save
+                    cost, makespan, solved, runtime = 0, 0, True, 0
+                    segment_out = None
+                    print("All agents already at their goals, skipped LaCAM")
+                elif cached:
+                    cost, makespan, solved, cached_runtime, cached_plan = _segment_cache[segment_keys[segment_idx]]
+                    runtime = 0  # no solver ran; runtime totals only count time actually spent
+                    shutil.copy2(cached_plan, segment_out)
+                    print(f"Reused plan from {cached_plan}")
+                else:
+                    cost, makespan, solved, runtime, plan_file = segment_runs[segment_idx]
             
-            # Save segment plan
-            segment_out = out_dir / f"segment_{segment_idx}.yaml"
-            if plan_file and os.path.exists(plan_file):
-                shutil.copy2(plan_file, segment_out)
-                os.remove(plan_file)  # Remove the original temp file
-                print(f"Saved segment plan to {segment_out}")
+                    if cost is None:
+                        print(f"Segment {segment_idx} failed!")
+                        sys.exit(1)
             
-            # Parse additional metrics from segment output
-            makespan = 0
-            solved = False
-            try:
-                with open(segment_out, 'r') as f:
-                    for line in f:
-                        if line.startswith('makespan='):
-                            makespan = int(line.split('=')[1].strip())
-                        elif line.startswith('solved='):
-                            solved = int(line.split('=')[1].strip()) == 1
-            except:
-                pass
+                    # Save segment plan
+                    if plan_file and os.path.exists(plan_file):
+                        try:
+                            os.replace(plan_file, segment_out)
+                        except OSError:
+                            shutil.move(plan_file, segment_out)
+                        print(f"Saved segment plan to {segment_out}")
+                        _segment_cache[segment_keys[segment_idx]] = (cost, makespan, solved, runtime, str(segment_out))
             
-            # Track segment results
-            segment_result = {
-                'segment_id': segment_idx,
-                'cost': cost,
-                'makespan': makespan,
-                'runtime_ms': runtime * 1000,
-                'solved': solved,
-                'output_file': str(segment_out)
-            }
-            segment_results.append(segment_result)
+                # Track segment results
+                segment_result = {
+                    'segment_id': segment_idx,
+                    'num_agents': len(segment_agents[segment_idx]),
+                    'cost': cost,
+                    'makespan': makespan,
+                    'runtime_ms': runtime * 1000,
+                    'solved': solved,
+                    'cached': cached,
+                    'output_file': str(segment_out) if segment_out else None
+                }
+                if cached:
+                    # Runtime of the run whose plan was reused, kept out of the totals
+                    segment_result['cached_runtime_ms'] = cached_runtime * 1000
+                if args.drop_finished:
+                    # Input scenario rows of the agents in this segment's plan, in plan order
+                    segment_result['agent_rows'] = [agent['scen_row'] for agent in segment_agents[segment_idx]]
+                segment_results.append(segment_result)
             
-            # Update totals
-            total_runtime += runtime
-            total_cost += cost
+                # Update totals
+                total_runtime += runtime
+                total_cost += cost
+                max_makespan = max(max_makespan, makespan)
+                all_solved = all_solved and solved
             
-            print(f"seg {segment_idx}  runtime={runtime*1000:.0f}ms  cost={cost}")
+                print(f"seg {segment_idx}  runtime={runtime*1000:.0f}ms  cost={cost}")
     
     except Exception as e:
         print(f"Error during execution: {e}")
-        cleanup_temp_files()
         sys.exit(1)
     
-    finally:
-        # Clean up temp files
-        cleanup_temp_files()
-    
     # Final summary
-    wall_clock_total = time.time() - wall_clock_start
+    # Stamp the end once; the ISO end_time below is derived from it
+    wall_clock_end = time.time()
+    wall_clock_total = wall_clock_end - wall_clock_start
     print(f"\n--- Global Summary ---")
     print(f"Total segment runtime: {total_runtime*1000:.0f}ms")
     print(f"Total segment cost: {total_cost}")
     print(f"Wall-clock time: {wall_clock_total*1000:.0f}ms")
     
     # Generate comprehensive results summary
-    max_makespan = max(seg['makespan'] for seg in segment_results) if segment_results else 0
-    all_solved = all(seg['solved'] for seg in segment_results)
-    
     summary = {
         'experiment_info': experiment_info,
         'global_results': {
@@ -405,7 +579,7 @@ def run_experiment(agents, args, out_dir):
             'max_makespan': max_makespan,
             'num_segments': len(segment_results),
             'all_segments_solved': all_solved,
-            'end_time': datetime.datetime.now().isoformat()
+            'end_time': datetime.datetime.fromtimestamp(wall_clock_end).isoformat()
         },
         'segment_results': segment_results,
         'agent_summary': {
@@ -424,8 +598,7 @@ def run_experiment(agents, args, out_dir):
     
     # Save individual experiment summary
     summary_file = out_dir / "waypoint_summary.json"
-    with open(summary_file, 'w') as f:
-        json.dump(summary, f, indent=2)
+    write_json(summary_file, summary)
     print(f"Comprehensive results saved to {summary_file}")
 
     # Also save a human-readable summary
@@ -466,8 +639,7 @@ def run_experiment(agents, args, out_dir):
 def generate_multi_scale_summary(all_results, out_dir, args):
     """Generate a summary for multi-scale experiments."""
     summary_file = out_dir / "multi_scale_summary.json"
-    with open(summary_file, 'w') as f:
-        json.dump(all_results, f, indent=2)
+    write_json(summary_file, all_results)
     print(f"Multi-scale summary saved to {summary_file}")
 
     # Also save a human-readable summary
@@ -2,6 +2,15 @@
 
 import subprocess
 import pathlib
+import os
+
+def dir_entries(path):
+    """Names in a directory, read with one scandir (empty if it doesn't exist)"""
+    try:
+        with os.scandir(path) as it:
+            return {entry.name for entry in it}
+    except OSError:
+        return set()
 
 # Test if lacam.py can be called with --help
 print("Testing lacam.py --help...")
@@ -22,12 +31,14 @@ print(f"build/main exists: {exe_path.exists()}")
 if exe_path.exists():
     print(f"build/main is executable: {exe_path.stat().st_mode & 0o111 != 0}")
 
-# Test if data files exist
+# Test if data files exist (one directory read per folder instead of a stat per file)
 print(f"\nData file check:")
+map_files = dir_entries("data/maps")
 for map_name in ["ost003d", "random-32-32-10", "empty-8-8"]:
     map_file = pathlib.Path(f"data/maps/{map_name}.map")
-    print(f"{map_file}: {map_file.exists()}")
+    print(f"{map_file}: {map_file.name in map_files}")
     
+    scen_files = dir_entries(f"data/scenarios/{map_name}")
     for wp in ["2wp", "4wp", "8wp"]:
         scen_file = pathlib.Path(f"data/scenarios/{map_name}/{map_name}-{wp}.scen")
-        print(f"{scen_file}: {scen_file.exists()}") 
\ No newline at end of file
+        print(f"{scen_file}: {scen_file.name in scen_files}") 
\ No newline at end of file